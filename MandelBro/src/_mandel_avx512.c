@@ -0,0 +1,232 @@
+/*
+ * MandelBro - AVX-512 Mandelbrot Kernel
+ *
+ * Escape loop for MandelbrotGenerator.calculate_mandelbrot that iterates eight
+ * pixels per __m512d register, or sixteen per __m512 in single precision.
+ * Escaped lanes are masked out of every update, so no movemask branch is
+ * needed per lane. Rows are spread over cores with OpenMP. Built by setup.py
+ * with -mavx512f -mavx512dq -fopenmp.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <immintrin.h>
+#include <stdint.h>
+
+/*
+ * Test which lanes lie inside the main cardioid or the period-2 bulb. Those
+ * points never escape, so they are assigned max_iter without iterating.
+ */
+static inline __mmask8
+in_main_bulbs_pd(__m512d cr, __m512d ci)
+{
+    const __m512d quarter = _mm512_set1_pd(0.25);
+    __m512d ci2 = _mm512_mul_pd(ci, ci);
+    __m512d xc = _mm512_sub_pd(cr, quarter);
+    __m512d q = _mm512_add_pd(_mm512_mul_pd(xc, xc), ci2);
+    __m512d xb = _mm512_add_pd(cr, _mm512_set1_pd(1.0));
+    return _mm512_cmp_pd_mask(_mm512_mul_pd(q, _mm512_add_pd(q, xc)),
+                              _mm512_mul_pd(quarter, ci2), _CMP_LT_OQ)
+        | _mm512_cmp_pd_mask(_mm512_add_pd(_mm512_mul_pd(xb, xb), ci2),
+                             _mm512_set1_pd(0.0625), _CMP_LT_OQ);
+}
+
+/* Single-precision version of in_main_bulbs_pd */
+static inline __mmask16
+in_main_bulbs_ps(__m512 cr, __m512 ci)
+{
+    const __m512 quarter = _mm512_set1_ps(0.25f);
+    __m512 ci2 = _mm512_mul_ps(ci, ci);
+    __m512 xc = _mm512_sub_ps(cr, quarter);
+    __m512 q = _mm512_add_ps(_mm512_mul_ps(xc, xc), ci2);
+    __m512 xb = _mm512_add_ps(cr, _mm512_set1_ps(1.0f));
+    return _mm512_cmp_ps_mask(_mm512_mul_ps(q, _mm512_add_ps(q, xc)),
+                              _mm512_mul_ps(quarter, ci2), _CMP_LT_OQ)
+        | _mm512_cmp_ps_mask(_mm512_add_ps(_mm512_mul_ps(xb, xb), ci2),
+                             _mm512_set1_ps(0.0625f), _CMP_LT_OQ);
+}
+
+/*
+ * Calculate one row of escape counts.
+ *
+ * A lane's count is incremented every iteration it survives, so a point that
+ * escapes on iteration i ends with i and a point that never escapes ends with
+ * max_iter, matching the other backends.
+ */
+static void
+mandel_row_avx512(const double *xs, Py_ssize_t w, double y, int max_iter, int32_t *out)
+{
+    const __m512d ci = _mm512_set1_pd(y);
+    const __m512d four = _mm512_set1_pd(4.0);
+    const __m512d one = _mm512_set1_pd(1.0);
+    int32_t tail_out[8];
+    Py_ssize_t x;
+
+    for (x = 0; x < w; x += 8) {
+        Py_ssize_t lanes = (w - x < 8) ? w - x : 8;
+        /* Lanes past the end of the row start out dead */
+        __mmask8 alive = (__mmask8)((1u << lanes) - 1u);
+        __m512d cr = _mm512_maskz_loadu_pd(alive, xs + x);
+        /* Points inside the main cardioid or period-2 bulb never escape */
+        __mmask8 inside = in_main_bulbs_pd(cr, ci) & alive;
+        __m512d zr = _mm512_setzero_pd();
+        __m512d zi = _mm512_setzero_pd();
+        __m512d zr2 = _mm512_setzero_pd();
+        __m512d zi2 = _mm512_setzero_pd();
+        __m512d iters = _mm512_setzero_pd();
+        int i;
+
+        alive &= ~inside;
+
+        for (i = 0; i < max_iter && alive; i++) {
+            /* z = z**2 + c for the lanes still iterating */
+            zi = _mm512_mask_fmadd_pd(zi, alive, _mm512_add_pd(zr, zr), ci);
+            zr = _mm512_mask_add_pd(zr, alive, _mm512_sub_pd(zr2, zi2), cr);
+            zr2 = _mm512_mask_mul_pd(zr2, alive, zr, zr);
+            zi2 = _mm512_mask_mul_pd(zi2, alive, zi, zi);
+
+            /* Retire the lanes whose |z|**2 exceeds 4 */
+            alive = _mm512_mask_cmp_pd_mask(alive, _mm512_add_pd(zr2, zi2), four, _CMP_LE_OQ);
+            iters = _mm512_mask_add_pd(iters, alive, iters, one);
+        }
+
+        iters = _mm512_mask_mov_pd(iters, inside, _mm512_set1_pd((double)max_iter));
+
+        if (lanes == 8) {
+            _mm256_storeu_si256((__m256i *)(out + x), _mm512_cvtpd_epi32(iters));
+        } else {
+            Py_ssize_t k;
+            _mm256_storeu_si256((__m256i *)tail_out, _mm512_cvtpd_epi32(iters));
+            for (k = 0; k < lanes; k++) {
+                out[x + k] = tail_out[k];
+            }
+        }
+    }
+}
+
+/* Single-precision version of mandel_row_avx512, sixteen pixels per __m512 */
+static void
+mandel_row_avx512_f32(const float *xs, Py_ssize_t w, float y, int max_iter, int32_t *out)
+{
+    const __m512 ci = _mm512_set1_ps(y);
+    const __m512 four = _mm512_set1_ps(4.0f);
+    const __m512 one = _mm512_set1_ps(1.0f);
+    Py_ssize_t x;
+
+    for (x = 0; x < w; x += 16) {
+        Py_ssize_t lanes = (w - x < 16) ? w - x : 16;
+        /* Lanes past the end of the row start out dead */
+        __mmask16 live = (__mmask16)((1u << lanes) - 1u);
+        __mmask16 alive = live;
+        __m512 cr = _mm512_maskz_loadu_ps(alive, xs + x);
+        /* Points inside the main cardioid or period-2 bulb never escape */
+        __mmask16 inside = in_main_bulbs_ps(cr, ci) & alive;
+        __m512 zr = _mm512_setzero_ps();
+        __m512 zi = _mm512_setzero_ps();
+        __m512 zr2 = _mm512_setzero_ps();
+        __m512 zi2 = _mm512_setzero_ps();
+        __m512 iters = _mm512_setzero_ps();
+        int i;
+
+        alive &= ~inside;
+
+        for (i = 0; i < max_iter && alive; i++) {
+            /* z = z**2 + c for the lanes still iterating */
+            zi = _mm512_mask_fmadd_ps(zi, alive, _mm512_add_ps(zr, zr), ci);
+            zr = _mm512_mask_add_ps(zr, alive, _mm512_sub_ps(zr2, zi2), cr);
+            zr2 = _mm512_mask_mul_ps(zr2, alive, zr, zr);
+            zi2 = _mm512_mask_mul_ps(zi2, alive, zi, zi);
+
+            /* Retire the lanes whose |z|**2 exceeds 4 */
+            alive = _mm512_mask_cmp_ps_mask(alive, _mm512_add_ps(zr2, zi2), four, _CMP_LE_OQ);
+            iters = _mm512_mask_add_ps(iters, alive, iters, one);
+        }
+
+        iters = _mm512_mask_mov_ps(iters, inside, _mm512_set1_ps((float)max_iter));
+
+        _mm512_mask_storeu_epi32(out + x, live, _mm512_cvtps_epi32(iters));
+    }
+}
+
+static PyObject *
+mandel_avx512(PyObject *self, PyObject *args)
+{
+    PyObject *xs_obj, *ys_obj, *out_obj;
+    Py_buffer xs, ys, out;
+    int max_iter, single;
+    Py_ssize_t w, h, y;
+
+    if (!PyArg_ParseTuple(args, "OOiO", &xs_obj, &ys_obj, &max_iter, &out_obj)) {
+        return NULL;
+    }
+    if (PyObject_GetBuffer(xs_obj, &xs, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        return NULL;
+    }
+    if (PyObject_GetBuffer(ys_obj, &ys, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        PyBuffer_Release(&xs);
+        return NULL;
+    }
+    if (PyObject_GetBuffer(out_obj, &out,
+                           PyBUF_C_CONTIGUOUS | PyBUF_FORMAT | PyBUF_WRITABLE) < 0) {
+        PyBuffer_Release(&xs);
+        PyBuffer_Release(&ys);
+        return NULL;
+    }
+
+    w = xs.len / (xs.itemsize ? xs.itemsize : 1);
+    h = ys.len / (ys.itemsize ? ys.itemsize : 1);
+    single = xs.itemsize == sizeof(float) && ys.itemsize == sizeof(float);
+    if (!(single || (xs.itemsize == sizeof(double) && ys.itemsize == sizeof(double)))
+            || out.itemsize != sizeof(int32_t) || out.len != w * h * (Py_ssize_t)sizeof(int32_t)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "expected float32 or float64 coordinates and an int32 output of shape (len(ys), len(xs))");
+        PyBuffer_Release(&xs);
+        PyBuffer_Release(&ys);
+        PyBuffer_Release(&out);
+        return NULL;
+    }
+
+    /* Rows are independent; dynamic scheduling balances the cheap rows
+       outside the set against the ones that run to max_iter */
+    Py_BEGIN_ALLOW_THREADS
+    #pragma omp parallel for schedule(dynamic, 8)
+    for (y = 0; y < h; y++) {
+        if (single) {
+            mandel_row_avx512_f32((const float *)xs.buf, w, ((const float *)ys.buf)[y],
+                                  max_iter, (int32_t *)out.buf + y * w);
+        } else {
+            mandel_row_avx512((const double *)xs.buf, w, ((const double *)ys.buf)[y],
+                              max_iter, (int32_t *)out.buf + y * w);
+        }
+    }
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&xs);
+    PyBuffer_Release(&ys);
+    PyBuffer_Release(&out);
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef mandel_avx512_methods[] = {
+    {"mandel_avx512", mandel_avx512, METH_VARARGS,
+     "mandel_avx512(xs, ys, max_iter, out)\n\n"
+     "Write escape iteration counts for the grid xs x ys into out.\n"
+     "xs and ys must both be float32 or both be float64."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef mandel_avx512_module = {
+    PyModuleDef_HEAD_INIT, "_mandel_avx512", NULL, -1, mandel_avx512_methods
+};
+
+PyMODINIT_FUNC
+PyInit__mandel_avx512(void)
+{
+    /* Refuse to load on CPUs that would fault on the first AVX-512 instruction */
+    __builtin_cpu_init();
+    if (!__builtin_cpu_supports("avx512f") || !__builtin_cpu_supports("avx512dq")) {
+        PyErr_SetString(PyExc_ImportError, "_mandel_avx512 requires AVX-512F and AVX-512DQ");
+        return NULL;
+    }
+    return PyModule_Create(&mandel_avx512_module);
+}
@@ -0,0 +1,269 @@
+/*
+ * MandelBro - AVX2 Mandelbrot Kernel
+ *
+ * Escape loop for MandelbrotGenerator.calculate_mandelbrot that iterates four
+ * pixels per __m256d register, or eight per __m256 in single precision.
+ * Rows are spread over cores with OpenMP. Built by setup.py with
+ * -mavx2 -mfma -fopenmp.
+ */
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <immintrin.h>
+#include <stdint.h>
+
+/*
+ * Test which lanes lie inside the main cardioid or the period-2 bulb. Those
+ * points never escape, so they are assigned max_iter without iterating.
+ */
+static inline __m256d
+in_main_bulbs_pd(__m256d cr, __m256d ci)
+{
+    const __m256d quarter = _mm256_set1_pd(0.25);
+    __m256d ci2 = _mm256_mul_pd(ci, ci);
+    __m256d xc = _mm256_sub_pd(cr, quarter);
+    __m256d q = _mm256_add_pd(_mm256_mul_pd(xc, xc), ci2);
+    __m256d cardioid = _mm256_cmp_pd(_mm256_mul_pd(q, _mm256_add_pd(q, xc)),
+                                     _mm256_mul_pd(quarter, ci2), _CMP_LT_OQ);
+    __m256d xb = _mm256_add_pd(cr, _mm256_set1_pd(1.0));
+    __m256d bulb = _mm256_cmp_pd(_mm256_add_pd(_mm256_mul_pd(xb, xb), ci2),
+                                 _mm256_set1_pd(0.0625), _CMP_LT_OQ);
+    return _mm256_or_pd(cardioid, bulb);
+}
+
+/* Single-precision version of in_main_bulbs_pd */
+static inline __m256
+in_main_bulbs_ps(__m256 cr, __m256 ci)
+{
+    const __m256 quarter = _mm256_set1_ps(0.25f);
+    __m256 ci2 = _mm256_mul_ps(ci, ci);
+    __m256 xc = _mm256_sub_ps(cr, quarter);
+    __m256 q = _mm256_add_ps(_mm256_mul_ps(xc, xc), ci2);
+    __m256 cardioid = _mm256_cmp_ps(_mm256_mul_ps(q, _mm256_add_ps(q, xc)),
+                                    _mm256_mul_ps(quarter, ci2), _CMP_LT_OQ);
+    __m256 xb = _mm256_add_ps(cr, _mm256_set1_ps(1.0f));
+    __m256 bulb = _mm256_cmp_ps(_mm256_add_ps(_mm256_mul_ps(xb, xb), ci2),
+                                _mm256_set1_ps(0.0625f), _CMP_LT_OQ);
+    return _mm256_or_ps(cardioid, bulb);
+}
+
+/*
+ * Calculate one row of escape counts.
+ *
+ * A lane's count is incremented every iteration it survives, so a point that
+ * escapes on iteration i ends with i and a point that never escapes ends with
+ * max_iter, matching the other backends.
+ */
+static void
+mandel_row_avx2(const double *xs, Py_ssize_t w, double y, int max_iter, int32_t *out)
+{
+    const __m256d ci = _mm256_set1_pd(y);
+    const __m256d four = _mm256_set1_pd(4.0);
+    const __m256d one = _mm256_set1_pd(1.0);
+    double tail_x[4];
+    int32_t tail_out[4];
+    Py_ssize_t x;
+
+    for (x = 0; x < w; x += 4) {
+        Py_ssize_t lanes = (w - x < 4) ? w - x : 4;
+        __m256d cr, zr, zi, zr2, zi2, mag, escaped, inside;
+        __m256d alive = _mm256_castsi256_pd(_mm256_set1_epi64x(-1));
+        __m256d iters = _mm256_setzero_pd();
+        int i;
+
+        /* Pad the last partial vector by repeating its final coordinate */
+        if (lanes == 4) {
+            cr = _mm256_loadu_pd(xs + x);
+        } else {
+            Py_ssize_t k;
+            for (k = 0; k < 4; k++) {
+                tail_x[k] = xs[x + (k < lanes ? k : lanes - 1)];
+            }
+            cr = _mm256_loadu_pd(tail_x);
+        }
+
+        /* Points inside the main cardioid or period-2 bulb never escape */
+        inside = in_main_bulbs_pd(cr, ci);
+        alive = _mm256_andnot_pd(inside, alive);
+
+        zr = _mm256_setzero_pd();
+        zi = _mm256_setzero_pd();
+        zr2 = _mm256_setzero_pd();
+        zi2 = _mm256_setzero_pd();
+
+        for (i = 0; i < max_iter && _mm256_movemask_pd(alive) != 0; i++) {
+            /* z = z**2 + c */
+            zi = _mm256_fmadd_pd(_mm256_add_pd(zr, zr), zi, ci);
+            zr = _mm256_add_pd(_mm256_sub_pd(zr2, zi2), cr);
+            zr2 = _mm256_mul_pd(zr, zr);
+            zi2 = _mm256_mul_pd(zi, zi);
+
+            /* Retire the lanes whose |z|**2 exceeds 4 */
+            mag = _mm256_add_pd(zr2, zi2);
+            escaped = _mm256_cmp_pd(mag, four, _CMP_GT_OQ);
+            alive = _mm256_andnot_pd(escaped, alive);
+            iters = _mm256_add_pd(iters, _mm256_and_pd(alive, one));
+        }
+
+        iters = _mm256_blendv_pd(iters, _mm256_set1_pd((double)max_iter), inside);
+
+        if (lanes == 4) {
+            _mm_storeu_si128((__m128i *)(out + x), _mm256_cvtpd_epi32(iters));
+        } else {
+            Py_ssize_t k;
+            _mm_storeu_si128((__m128i *)tail_out, _mm256_cvtpd_epi32(iters));
+            for (k = 0; k < lanes; k++) {
+                out[x + k] = tail_out[k];
+            }
+        }
+    }
+}
+
+/* Single-precision version of mandel_row_avx2, eight pixels per __m256 */
+static void
+mandel_row_avx2_f32(const float *xs, Py_ssize_t w, float y, int max_iter, int32_t *out)
+{
+    const __m256 ci = _mm256_set1_ps(y);
+    const __m256 four = _mm256_set1_ps(4.0f);
+    const __m256 one = _mm256_set1_ps(1.0f);
+    float tail_x[8];
+    int32_t tail_out[8];
+    Py_ssize_t x;
+
+    for (x = 0; x < w; x += 8) {
+        Py_ssize_t lanes = (w - x < 8) ? w - x : 8;
+        __m256 cr, zr, zi, zr2, zi2, mag, escaped, inside;
+        __m256 alive = _mm256_castsi256_ps(_mm256_set1_epi32(-1));
+        __m256 iters = _mm256_setzero_ps();
+        int i;
+
+        /* Pad the last partial vector by repeating its final coordinate */
+        if (lanes == 8) {
+            cr = _mm256_loadu_ps(xs + x);
+        } else {
+            Py_ssize_t k;
+            for (k = 0; k < 8; k++) {
+                tail_x[k] = xs[x + (k < lanes ? k : lanes - 1)];
+            }
+            cr = _mm256_loadu_ps(tail_x);
+        }
+
+        /* Points inside the main cardioid or period-2 bulb never escape */
+        inside = in_main_bulbs_ps(cr, ci);
+        alive = _mm256_andnot_ps(inside, alive);
+
+        zr = _mm256_setzero_ps();
+        zi = _mm256_setzero_ps();
+        zr2 = _mm256_setzero_ps();
+        zi2 = _mm256_setzero_ps();
+
+        for (i = 0; i < max_iter && _mm256_movemask_ps(alive) != 0; i++) {
+            /* z = z**2 + c */
+            zi = _mm256_fmadd_ps(_mm256_add_ps(zr, zr), zi, ci);
+            zr = _mm256_add_ps(_mm256_sub_ps(zr2, zi2), cr);
+            zr2 = _mm256_mul_ps(zr, zr);
+            zi2 = _mm256_mul_ps(zi, zi);
+
+            /* Retire the lanes whose |z|**2 exceeds 4 */
+            mag = _mm256_add_ps(zr2, zi2);
+            escaped = _mm256_cmp_ps(mag, four, _CMP_GT_OQ);
+            alive = _mm256_andnot_ps(escaped, alive);
+            iters = _mm256_add_ps(iters, _mm256_and_ps(alive, one));
+        }
+
+        iters = _mm256_blendv_ps(iters, _mm256_set1_ps((float)max_iter), inside);
+
+        if (lanes == 8) {
+            _mm256_storeu_si256((__m256i *)(out + x), _mm256_cvtps_epi32(iters));
+        } else {
+            Py_ssize_t k;
+            _mm256_storeu_si256((__m256i *)tail_out, _mm256_cvtps_epi32(iters));
+            for (k = 0; k < lanes; k++) {
+                out[x + k] = tail_out[k];
+            }
+        }
+    }
+}
+
+static PyObject *
+mandel_avx2(PyObject *self, PyObject *args)
+{
+    PyObject *xs_obj, *ys_obj, *out_obj;
+    Py_buffer xs, ys, out;
+    int max_iter, single;
+    Py_ssize_t w, h, y;
+
+    if (!PyArg_ParseTuple(args, "OOiO", &xs_obj, &ys_obj, &max_iter, &out_obj)) {
+        return NULL;
+    }
+    if (PyObject_GetBuffer(xs_obj, &xs, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        return NULL;
+    }
+    if (PyObject_GetBuffer(ys_obj, &ys, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT) < 0) {
+        PyBuffer_Release(&xs);
+        return NULL;
+    }
+    if (PyObject_GetBuffer(out_obj, &out,
+                           PyBUF_C_CONTIGUOUS | PyBUF_FORMAT | PyBUF_WRITABLE) < 0) {
+        PyBuffer_Release(&xs);
+        PyBuffer_Release(&ys);
+        return NULL;
+    }
+
+    w = xs.len / (xs.itemsize ? xs.itemsize : 1);
+    h = ys.len / (ys.itemsize ? ys.itemsize : 1);
+    single = xs.itemsize == sizeof(float) && ys.itemsize == sizeof(float);
+    if (!(single || (xs.itemsize == sizeof(double) && ys.itemsize == sizeof(double)))
+            || out.itemsize != sizeof(int32_t) || out.len != w * h * (Py_ssize_t)sizeof(int32_t)) {
+        PyErr_SetString(PyExc_ValueError,
+                        "expected float32 or float64 coordinates and an int32 output of shape (len(ys), len(xs))");
+        PyBuffer_Release(&xs);
+        PyBuffer_Release(&ys);
+        PyBuffer_Release(&out);
+        return NULL;
+    }
+
+    /* Rows are independent; dynamic scheduling balances the cheap rows
+       outside the set against the ones that run to max_iter */
+    Py_BEGIN_ALLOW_THREADS
+    #pragma omp parallel for schedule(dynamic, 8)
+    for (y = 0; y < h; y++) {
+        if (single) {
+            mandel_row_avx2_f32((const float *)xs.buf, w, ((const float *)ys.buf)[y],
+                                max_iter, (int32_t *)out.buf + y * w);
+        } else {
+            mandel_row_avx2((const double *)xs.buf, w, ((const double *)ys.buf)[y],
+                            max_iter, (int32_t *)out.buf + y * w);
+        }
+    }
+    Py_END_ALLOW_THREADS
+
+    PyBuffer_Release(&xs);
+    PyBuffer_Release(&ys);
+    PyBuffer_Release(&out);
+    Py_RETURN_NONE;
+}
+
+static PyMethodDef mandel_simd_methods[] = {
+    {"mandel_avx2", mandel_avx2, METH_VARARGS,
+     "mandel_avx2(xs, ys, max_iter, out)\n\n"
+     "Write escape iteration counts for the grid xs x ys into out.\n"
+     "xs and ys must both be float32 or both be float64."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef mandel_simd_module = {
+    PyModuleDef_HEAD_INIT, "_mandel_simd", NULL, -1, mandel_simd_methods
+};
+
+PyMODINIT_FUNC
+PyInit__mandel_simd(void)
+{
+    /* Refuse to load on CPUs that would fault on the first AVX2 instruction */
+    __builtin_cpu_init();
+    if (!__builtin_cpu_supports("avx2") || !__builtin_cpu_supports("fma")) {
+        PyErr_SetString(PyExc_ImportError, "_mandel_simd requires AVX2 and FMA");
+        return NULL;
+    }
+    return PyModule_Create(&mandel_simd_module);
+}
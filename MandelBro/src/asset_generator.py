@@ -7,26 +7,100 @@ based on the Mandelbrot set terrain and user descriptions.
 
 import os
 import json
+import math
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 import numpy as np
-import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
-import random
+from matplotlib.figure import Figure
+
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; calculate_slope falls back to NumPy
+    njit = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; exports fall back to the json module
+    orjson = None
+
+try:
+    import cupy as cp
+except ImportError:  # CuPy is optional; terrain masks are computed on the CPU
+    cp = None
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _slope_kernel(h, out):
+        """Fused gradient magnitude with the same edge handling as np.gradient."""
+        rows, cols = h.shape
+        for i in prange(rows):
+            # Central differences inside, one-sided differences on the edges
+            up = i - 1 if i > 0 else 0
+            down = i + 1 if i < rows - 1 else rows - 1
+            y_scale = 1.0 / (down - up)
+            for j in range(1, cols - 1):
+                dx = (h[i, j + 1] - h[i, j - 1]) * 0.5
+                dy = (h[down, j] - h[up, j]) * y_scale
+                out[i, j] = math.sqrt(dx * dx + dy * dy)
+            dx = h[i, 1] - h[i, 0]
+            dy = (h[down, 0] - h[up, 0]) * y_scale
+            out[i, 0] = math.sqrt(dx * dx + dy * dy)
+            dx = h[i, cols - 1] - h[i, cols - 2]
+            dy = (h[down, cols - 1] - h[up, cols - 1]) * y_scale
+            out[i, cols - 1] = math.sqrt(dx * dx + dy * dy)
+else:
+    _slope_kernel = None
+
+
+if cp is not None:
+    @cp.fuse()
+    def _gradient_magnitude(gx, gy):
+        """Fused elementwise slope magnitude on the GPU."""
+        return cp.sqrt(gx * gx + gy * gy)
+
+
+# Colormap for the height map in asset visualizations
+_MB_CMAP = LinearSegmentedColormap.from_list(
+    "mandelbro",
+    [(0, 0, 0.5), (0, 0, 1), (0, 0.5, 1),
+     (0, 1, 1), (0.5, 1, 0.5), (1, 1, 0),
+     (1, 0.5, 0), (1, 0, 0), (0.5, 0, 0)]
+)
 
 class AssetGenerator:
     """
     A class to generate and place assets in the MandelBro game world.
     """
     
-    def __init__(self, assets_dir=None):
+    # Properties every asset type needs to be placed
+    _REQUIRED_PROPERTIES = ('min_height', 'max_height', 'min_slope', 'max_slope',
+                            'height_range', 'width_range', 'color_range', 'placement')
+    
+    def __init__(self, assets_dir=None, use_gpu=False, cache_dir=None):
         """
         Initialize the asset generator.
         
         Args:
             assets_dir (str, optional): Directory containing asset templates
+            use_gpu (bool): Compute terrain attributes and masks with CuPy
+                on the GPU when it is installed
+            cache_dir (str, optional): Directory for a persistent cache of
+                seeded place_assets results
         """
         self.assets_dir = assets_dir
+        self.cache_dir = cache_dir
         
-        # Define basic asset types and their properties
+        # Array module for terrain computations; coordinates and asset
+        # properties always live on the host
+        if use_gpu and cp is None:
+            print("Warning: CuPy is not installed, computing terrain masks on the CPU")
+        self._xp = cp if use_gpu and cp is not None else np
+        
+        # Define basic asset types and their properties; call
+        # refresh_asset_types after changing them
         self.asset_types = {
             'tree': {
                 'height_range': (0.5, 5.0),
@@ -253,6 +327,103 @@ class AssetGenerator:
         # Load custom assets if directory is provided
         if assets_dir and os.path.exists(assets_dir):
             self.load_custom_assets(assets_dir)
+        
+        self._build_type_tables()
+        
+        # Maps with more cells than this are masked in bands of rows of about
+        # this many cells, so the masks stay cache-sized
+        self.tile_cells = 1 << 20
+        
+        # Land depressions cached by height map content, oldest first
+        self.terrain_cache_size = 8
+        self._depression_cache = {}
+        
+        # Visualization figure, created on first use and reused afterwards
+        self._fig = None
+        self._ax = None
+        self._colorbar = None
+    
+    def _check_properties(self, properties):
+        """
+        Check that an asset type definition can be used for placement.
+        
+        Args:
+            properties (dict): Properties of the asset type
+            
+        Returns:
+            str: Description of the problem, or None if the definition is usable
+        """
+        if not isinstance(properties, dict):
+            return "properties must be an object"
+        
+        missing = [key for key in self._REQUIRED_PROPERTIES if key not in properties]
+        if missing:
+            return f"missing properties {', '.join(missing)}"
+        
+        try:
+            for key in ('min_height', 'max_height', 'min_slope', 'max_slope'):
+                float(properties[key])
+            for key in ('height_range', 'width_range'):
+                if np.asarray(properties[key], dtype=np.float64).shape != (2,):
+                    return f"{key} must be a [min, max] pair"
+            if np.asarray(properties['color_range'], dtype=np.float64).shape != (2, 3):
+                return "color_range must be a pair of RGB colors"
+        except (TypeError, ValueError) as e:
+            return f"invalid property value: {e}"
+        
+        return None
+    
+    def _build_type_tables(self):
+        """
+        Stack the per-type placement properties into arrays indexed by type.
+        
+        Types whose definitions are incomplete are left out.
+        """
+        self._type_names = [name for name, properties in self.asset_types.items()
+                            if self._check_properties(properties) is None]
+        self._type_idx = {name: i for i, name in enumerate(self._type_names)}
+        
+        props = [self.asset_types[name] for name in self._type_names]
+        
+        # Thresholds share the float32 precision of the terrain maps
+        self._min_h = np.array([p['min_height'] for p in props], dtype=np.float32)
+        self._max_h = np.array([p['max_height'] for p in props], dtype=np.float32)
+        self._min_s = np.array([p['min_slope'] for p in props], dtype=np.float32)
+        self._max_s = np.array([p['max_slope'] for p in props], dtype=np.float32)
+        self._height_range = np.array([p['height_range'] for p in props], dtype=np.float64)
+        self._width_range = np.array([p['width_range'] for p in props], dtype=np.float64)
+        self._color_range = np.array([p['color_range'] for p in props], dtype=np.float64)
+        self._placement = [p['placement'] for p in props]
+    
+    def refresh_asset_types(self):
+        """
+        Apply changes made directly to asset_types.
+        
+        Placement reads the asset types from tables built ahead of time, so
+        call this after adding, removing or editing entries of asset_types.
+        load_custom_assets refreshes them itself.
+        """
+        self._build_type_tables()
+    
+    def _type_index(self, asset_type):
+        """
+        Get the table index of an asset type, falling back to tree.
+        
+        Args:
+            asset_type (str): Type of asset
+            
+        Returns:
+            int: Row of the asset type in the type tables
+        """
+        i = self._type_idx.get(asset_type)
+        if i is None:
+            if asset_type in self.asset_types:
+                problem = self._check_properties(self.asset_types[asset_type])
+                print(f"Warning: Incomplete asset type '{asset_type}' ({problem}), using default properties")
+            else:
+                print(f"Warning: Unknown asset type '{asset_type}', using default properties")
+            i = self._type_idx['tree']  # Default to tree properties
+        return i
     
     def load_custom_assets(self, assets_dir):
         """
@@ -261,15 +432,34 @@ class AssetGenerator:
         Args:
             assets_dir (str): Directory containing asset JSON files
         """
-        for filename in os.listdir(assets_dir):
-            if filename.endswith('.json'):
-                try:
-                    with open(os.path.join(assets_dir, filename), 'r') as f:
-                        asset_data = json.load(f)
-                        if 'asset_type' in asset_data and 'properties' in asset_data:
-                            self.asset_types[asset_data['asset_type']] = asset_data['properties']
-                except Exception as e:
-                    print(f"Error loading asset file {filename}: {e}")
+        def read_asset_file(path):
+            try:
+                data = path.read_bytes()
+                asset_data = orjson.loads(data) if orjson is not None else json.loads(data)
+                if not isinstance(asset_data, dict):
+                    raise ValueError(f"expected a JSON object, got {type(asset_data).__name__}")
+                if not isinstance(asset_data.get('asset_type', ''), str):
+                    raise ValueError("asset_type must be a string")
+                return asset_data, None
+            except Exception as e:
+                return None, e
+        
+        # Read and parse the files concurrently, then apply them in name order
+        paths = sorted(Path(assets_dir).glob('*.json'))
+        with ThreadPoolExecutor() as executor:
+            results = list(executor.map(read_asset_file, paths))
+        
+        for path, (asset_data, error) in zip(paths, results):
+            if error is not None:
+                print(f"Error loading asset file {path.name}: {error}")
+            elif 'asset_type' in asset_data and 'properties' in asset_data:
+                problem = self._check_properties(asset_data['properties'])
+                if problem is not None:
+                    print(f"Error loading asset file {path.name}: {problem}")
+                else:
+                    self.asset_types[asset_data['asset_type']] = asset_data['properties']
+        
+        self._build_type_tables()
     
     def save_asset_definitions(self, output_dir):
         """
@@ -296,17 +486,169 @@ class AssetGenerator:
             height_map (numpy.ndarray): 2D array of height values
             
         Returns:
-            numpy.ndarray: 2D array of slope values
+            numpy.ndarray: 2D float32 array of slope values (a CuPy array
+                when the generator uses the GPU)
         """
+        # Heights are bounded to 0-1, so single precision is plenty and
+        # halves the memory traffic of every pass over the map
+        if self._xp is not np:
+            gy, gx = cp.gradient(cp.asarray(height_map, dtype=cp.float32))
+            return _gradient_magnitude(gx, gy)
+        
+        h = np.ascontiguousarray(height_map, dtype=np.float32)
+        
+        # Single pass over the map when the compiled kernel is available
+        if _slope_kernel is not None and h.ndim == 2 and min(h.shape) >= 2:
+            slope = np.empty_like(h)
+            _slope_kernel(h, slope)
+            return slope
+        
         # Calculate gradients in x and y directions
-        gy, gx = np.gradient(height_map)
+        gy, gx = np.gradient(h)
         
         # Calculate slope as magnitude of gradient
         slope = np.sqrt(gx**2 + gy**2)
         
         return slope
     
-    def find_placement_locations(self, height_map, asset_type, density=1.0, seed=None):
+    def normalized_slope(self, height_map):
+        """
+        Calculate the terrain slope scaled to the 0-1 range.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            
+        Returns:
+            numpy.ndarray: 2D array of slope values in the 0-1 range
+        """
+        slope = self.calculate_slope(height_map)
+        
+        # Normalize slope to 0-1 range
+        max_slope = np.max(slope)
+        if max_slope > 0:
+            slope = slope / max_slope
+        
+        return slope
+    
+    def local_minimum(self, height_map):
+        """
+        Calculate the minimum height within a neighborhood of each point.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            
+        Returns:
+            numpy.ndarray: 2D array of neighborhood minimum heights
+        """
+        if self._xp is np:
+            from scipy import ndimage
+        else:
+            from cupyx.scipy import ndimage
+        neighborhood_size = max(5, int(min(height_map.shape) / 20))
+        
+        # A square minimum is separable: two 1D passes give the same result
+        # as the full 2D footprint with O(k) instead of O(k^2) work per pixel
+        local_min = ndimage.minimum_filter1d(height_map, size=neighborhood_size, axis=0)
+        return ndimage.minimum_filter1d(local_min, size=neighborhood_size, axis=1)
+    
+    def land_depressions(self, height_map, local_min=None):
+        """
+        Find the points lying close to the minimum of their neighborhood.
+        
+        Pass the height map at its original precision: rounding it to
+        float32 first moves differences of exactly 0.1 across the threshold.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            local_min (numpy.ndarray, optional): Precomputed neighborhood
+                minimum (see local_minimum)
+            
+        Returns:
+            numpy.ndarray: 2D boolean array, True in depressions
+        """
+        if local_min is None:
+            local_min = self.local_minimum(height_map)
+        return (height_map - local_min) < 0.1
+    
+    def water_boundary(self, height_map):
+        """
+        Find the points on the boundary between water and land.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            
+        Returns:
+            numpy.ndarray: 2D boolean array, True next to both water and land
+        """
+        water_mask = height_map <= 0.3
+        
+        # A point is on the boundary when one of its 4 neighbors is of the
+        # opposite class; this equals dilating both classes and intersecting
+        boundary = np.zeros_like(water_mask)
+        vertical = water_mask[1:] ^ water_mask[:-1]
+        boundary[1:] |= vertical
+        boundary[:-1] |= vertical
+        horizontal = water_mask[:, 1:] ^ water_mask[:, :-1]
+        boundary[:, 1:] |= horizontal
+        boundary[:, :-1] |= horizontal
+        
+        return boundary
+    
+    def clear_terrain_cache(self):
+        """Drop all cached land depressions."""
+        self._depression_cache.clear()
+    
+    def _terrain_key(self, height_map):
+        """
+        Build a cache key identifying a height map by its content.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            
+        Returns:
+            tuple: Shape, dtype and content digest of the height map
+        """
+        data = np.ascontiguousarray(self._to_host(height_map))
+        digest = hashlib.blake2b(data, digest_size=16).digest()
+        return data.shape, data.dtype.str, digest
+    
+    def _to_host(self, array):
+        """
+        Bring an array computed by the terrain array module back to NumPy.
+        
+        Args:
+            array (array-like): NumPy or CuPy array
+            
+        Returns:
+            numpy.ndarray: The array in host memory
+        """
+        if self._xp is np:
+            return array
+        return cp.asnumpy(array)
+    
+    def _cached_terrain(self, cache, key, compute, height_map):
+        """
+        Look up a terrain attribute, computing and storing it on a miss.
+        
+        Args:
+            cache (dict): Cache for this attribute
+            key (tuple): Key of the height map from _terrain_key
+            compute (callable): Function computing the attribute from the height map
+            height_map (numpy.ndarray): 2D array of height values
+            
+        Returns:
+            numpy.ndarray: The terrain attribute
+        """
+        result = cache.get(key)
+        if result is None:
+            result = compute(height_map)
+            if len(cache) >= self.terrain_cache_size:
+                cache.pop(next(iter(cache)))
+            cache[key] = result
+        return result
+    
+    def find_placement_locations(self, height_map, asset_type, density=1.0, seed=None, rng=None,
+                                 slope=None, local_min=None, boundary=None):
         """
         Find suitable locations for placing assets based on terrain properties.
         
@@ -315,91 +657,215 @@ class AssetGenerator:
             asset_type (str): Type of asset to place
             density (float): Density factor for asset placement (0.0 to 2.0)
             seed (int, optional): Random seed for reproducibility
+            rng (numpy.random.Generator, optional): Generator to draw from;
+                takes precedence over seed
+            slope (numpy.ndarray, optional): Precomputed normalized slope
+                (see normalized_slope)
+            local_min (numpy.ndarray, optional): Precomputed neighborhood
+                minimum (see local_minimum)
+            boundary (numpy.ndarray, optional): Precomputed water boundary
+                (see water_boundary)
             
         Returns:
             list: List of (x, y) coordinates for asset placement
         """
-        if seed is not None:
-            np.random.seed(seed)
-            random.seed(seed)
+        if rng is None:
+            rng = np.random.default_rng(seed)
+        source_map = self._xp.asarray(height_map)
+        height_map = self._xp.asarray(height_map, dtype=np.float32)
         
-        # Get asset properties
-        if asset_type not in self.asset_types:
-            print(f"Warning: Unknown asset type '{asset_type}', using default properties")
-            asset_props = self.asset_types['tree']  # Default to tree properties
-        else:
-            asset_props = self.asset_types[asset_type]
+        # Calculate normalized slope unless the caller already has it
+        if slope is None:
+            slope = self.normalized_slope(height_map)
         
-        # Calculate slope
-        slope = self.calculate_slope(height_map)
+        i = self._type_index(asset_type)
+        depression = None
+        if self._placement[i] == 'land_depression':
+            depression = self.land_depressions(source_map, local_min)
+        x_coords, y_coords = self._placement_coords(
+            height_map, i, density, rng, slope, depression=depression, boundary=boundary
+        )
         
-        # Normalize slope to 0-1 range
-        max_slope = np.max(slope)
-        if max_slope > 0:
-            slope = slope / max_slope
+        # Return as list of (x, y) coordinates
+        return list(zip(x_coords.tolist(), y_coords.tolist()))
+    
+    def _range_masks(self, height_map, slope, type_indices):
+        """
+        Build the height and slope range masks of several asset types at once.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            slope (numpy.ndarray): Normalized slope of the height map
+            type_indices (list): Rows of the asset types in the type tables
+            
+        Returns:
+            numpy.ndarray: Boolean array of shape (K, H, W), one mask per type
+        """
+        xp = self._xp
+        idx = np.asarray(type_indices, dtype=np.intp)
+        masks = xp.ones((idx.size,) + height_map.shape, dtype=bool)
+        
+        # A lower threshold at or below the smallest value, or an upper one at
+        # or above the largest, excludes nothing and needs no comparison; the
+        # normalized slope always spans at most 0-1
+        h_lo, h_hi = float(height_map.min()), float(height_map.max())
+        tests = (
+            (height_map, xp.greater_equal, self._min_h[idx], self._min_h[idx] > h_lo),
+            (height_map, xp.less_equal, self._max_h[idx], self._max_h[idx] < h_hi),
+            (slope, xp.greater_equal, self._min_s[idx], self._min_s[idx] > 0),
+            (slope, xp.less_equal, self._max_s[idx], self._max_s[idx] < 1)
+        )
+        
+        for values, compare, thresholds, needed in tests:
+            if needed.all():
+                # Broadcast every type's threshold against the shared map in one pass
+                masks &= compare(values, xp.asarray(thresholds[:, None, None]))
+            else:
+                for k in np.flatnonzero(needed):
+                    masks[k] &= compare(values, thresholds[k])
         
-        # Create mask for suitable locations
-        height_mask = (height_map >= asset_props['min_height']) & (height_map <= asset_props['max_height'])
-        slope_mask = (slope >= asset_props['min_slope']) & (slope <= asset_props['max_slope'])
+        return masks
+    
+    def _suitable_indices(self, height_map, i, mask, slope, depression=None, boundary=None):
+        """
+        Find the flat indices of the points where an asset type can be placed.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            i (int): Row of the asset type in the type tables
+            mask (numpy.ndarray): Range mask of the type from _range_masks;
+                modified in place
+            slope (numpy.ndarray): Normalized slope of the height map
+            depression (numpy.ndarray, optional): Precomputed land depressions
+            boundary (numpy.ndarray, optional): Precomputed water boundary
+            
+        Returns:
+            numpy.ndarray: Row-major flat indices of suitable points
+        """
+        # Narrow the mask in place, ANDing each extra condition into it
+        # through a reused scratch array
+        scratch = np.empty_like(mask)
         
         # Special handling for different placement types
-        placement_type = asset_props['placement']
-        placement_mask = np.ones_like(height_map, dtype=bool)
+        placement_type = self._placement[i]
         
         if placement_type == 'water':
             # Water assets go in low areas
-            placement_mask = height_map <= 0.3
+            mask &= np.less_equal(height_map, 0.3, out=scratch)
         elif placement_type == 'water_body':
             # Water bodies go in flat, low areas
-            placement_mask = (height_map <= 0.3) & (slope <= 0.1)
+            mask &= np.less_equal(height_map, 0.3, out=scratch)
+            mask &= np.less_equal(slope, 0.1, out=scratch)
         elif placement_type == 'water_flow':
             # Rivers follow moderate slopes
-            placement_mask = (height_map <= 0.5) & (slope >= 0.05) & (slope <= 0.5)
+            mask &= np.less_equal(height_map, 0.5, out=scratch)
+            mask &= np.greater_equal(slope, 0.05, out=scratch)
+            mask &= np.less_equal(slope, 0.5, out=scratch)
         elif placement_type == 'water_crossing':
-            # Bridges cross water areas
-            water_mask = height_map <= 0.3
-            land_mask = height_map > 0.3
-            # Find boundaries between water and land
-            from scipy import ndimage
-            water_dilated = ndimage.binary_dilation(water_mask)
-            land_dilated = ndimage.binary_dilation(land_mask)
-            placement_mask = water_dilated & land_dilated
+            # Bridges cross water areas, at boundaries between water and land
+            if boundary is None:
+                boundary = self.water_boundary(height_map)
+            mask &= boundary
         elif placement_type == 'land_depression':
             # Find local minima in the terrain
-            from scipy import ndimage
-            neighborhood_size = max(5, int(min(height_map.shape) / 20))
-            footprint = np.ones((neighborhood_size, neighborhood_size))
-            local_min = ndimage.minimum_filter(height_map, footprint=footprint)
-            placement_mask = (height_map - local_min) < 0.1
-        elif placement_type == 'sky':
-            # Sky assets can go anywhere, but prefer higher altitudes
-            placement_mask = np.ones_like(height_map, dtype=bool)
+            if depression is None:
+                depression = self.land_depressions(height_map)
+            mask &= depression
+        # 'land' and 'sky' assets have no further constraints
+        
+        return np.flatnonzero(mask)
+    
+    def _suitable_indices_tiled(self, height_map, i, slope, depression=None, boundary=None):
+        """
+        Find suitable flat indices band by band, without a full-size mask.
+        
+        Bands span whole rows, so the indices come out in the same row-major
+        order as masking the whole map at once.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            i (int): Row of the asset type in the type tables
+            slope (numpy.ndarray): Normalized slope of the height map
+            depression (numpy.ndarray, optional): Precomputed land depressions
+            boundary (numpy.ndarray, optional): Precomputed water boundary
+            
+        Returns:
+            numpy.ndarray: Row-major flat indices of suitable points
+        """
+        rows, cols = height_map.shape
         
-        # Combine all masks
-        combined_mask = height_mask & slope_mask & placement_mask
+        # Neighborhood attributes must see the whole map, not a single band
+        if self._placement[i] == 'land_depression' and depression is None:
+            depression = self.land_depressions(height_map)
+        if self._placement[i] == 'water_crossing' and boundary is None:
+            boundary = self.water_boundary(height_map)
         
-        # Get coordinates of suitable locations
-        y_coords, x_coords = np.where(combined_mask)
+        band = max(1, self.tile_cells // cols)
+        parts = []
+        for y0 in range(0, rows, band):
+            ys = slice(y0, y0 + band)
+            mask = self._range_masks(height_map[ys], slope[ys], [i])[0]
+            indices = self._suitable_indices(
+                height_map[ys], i, mask, slope[ys],
+                depression=None if depression is None else depression[ys],
+                boundary=None if boundary is None else boundary[ys]
+            )
+            parts.append(indices + y0 * cols)
+        
+        return np.concatenate(parts)
+    
+    def _placement_coords(self, height_map, i, density, rng, slope, mask=None, depression=None,
+                          boundary=None):
+        """
+        Select placement coordinates for an asset type.
+        
+        Args:
+            height_map (numpy.ndarray): 2D array of height values
+            i (int): Row of the asset type in the type tables
+            density (float): Density factor for asset placement (0.0 to 2.0)
+            rng (numpy.random.Generator): Generator to draw from
+            slope (numpy.ndarray): Normalized slope of the height map
+            mask (numpy.ndarray, optional): Range mask of the type from
+                _range_masks, modified in place; built band by band if omitted
+            depression (numpy.ndarray, optional): Precomputed land depressions
+            boundary (numpy.ndarray, optional): Precomputed water boundary
+            
+        Returns:
+            tuple: Arrays of x and y coordinates
+        """
+        if mask is not None:
+            suitable = self._suitable_indices(height_map, i, mask, slope, depression, boundary)
+        else:
+            suitable = self._suitable_indices_tiled(height_map, i, slope, depression, boundary)
         
-        if len(y_coords) == 0:
-            return []
+        # Sampling happens on the host; only the suitable indices are copied
+        suitable = self._to_host(suitable)
+        
+        if suitable.size == 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
         
         # Determine number of assets to place based on density
-        total_suitable = len(y_coords)
+        total_suitable = suitable.size
         base_count = int(np.sqrt(total_suitable) * 0.1)  # Base count scales with sqrt of suitable area
         count = max(1, int(base_count * density))
         count = min(count, total_suitable)  # Can't place more than available locations
         
-        # Randomly select locations
-        indices = np.random.choice(total_suitable, size=count, replace=False)
+        # Randomly select locations; Generator.choice samples k of N without
+        # replacement in O(k) (Floyd's algorithm) when k is small, and the
+        # selection needs no shuffling since its order carries no meaning
+        indices = rng.choice(total_suitable, size=count, replace=False, shuffle=False)
         
-        # Return as list of (x, y) coordinates
-        return [(x_coords[i], y_coords[i]) for i in indices]
+        # Convert the selected flat indices back to (row, column)
+        y_coords, x_coords = np.divmod(suitable[indices], height_map.shape[1])
+        return x_coords, y_coords
     
     def generate_asset_properties(self, asset_type, seed=None):
         """
         Generate properties for a specific asset instance.
         
+        This is a single-instance convenience wrapper; place_assets draws the
+        properties for all instances of a type in one batch instead.
+        
         Args:
             asset_type (str): Type of asset
             seed (int, optional): Random seed for reproducibility
@@ -407,37 +873,21 @@ class AssetGenerator:
         Returns:
             dict: Asset properties
         """
-        if seed is not None:
-            np.random.seed(seed)
-            random.seed(seed)
+        rng = np.random.default_rng(seed)
         
-        # Get asset type properties
-        if asset_type not in self.asset_types:
-            print(f"Warning: Unknown asset type '{asset_type}', using default properties")
-            asset_props = self.asset_types['tree']  # Default to tree properties
-        else:
-            asset_props = self.asset_types[asset_type]
-        
-        # Generate random properties within ranges
-        height = np.random.uniform(*asset_props['height_range'])
-        width = np.random.uniform(*asset_props['width_range'])
-        
-        # Generate random color within range
-        color_min, color_max = asset_props['color_range']
-        color = [np.random.uniform(color_min[i], color_max[i]) for i in range(3)]
-        
-        # Generate random rotation
-        rotation = np.random.uniform(0, 360)
+        # Get asset type properties, the same way placement does
+        i = self._type_index(asset_type)
+        color_min, color_max = self._color_range[i]
         
         return {
             'type': asset_type,
-            'height': height,
-            'width': width,
-            'color': color,
-            'rotation': rotation
+            'height': float(rng.uniform(*self._height_range[i])),
+            'width': float(rng.uniform(*self._width_range[i])),
+            'color': rng.uniform(color_min, color_max).tolist(),
+            'rotation': float(rng.uniform(0, 360))
         }
     
-    def place_assets(self, height_map, world_params, seed=None):
+    def place_assets(self, height_map, world_params, seed=None, cache_enabled=True):
         """
         Place assets in the world based on height map and parameters.
         
@@ -445,9 +895,14 @@ class AssetGenerator:
             height_map (numpy.ndarray): 2D array of height values
             world_params (dict): World generation parameters
             seed (int, optional): Random seed for reproducibility
+            cache_enabled (bool): Reuse and store results in cache_dir when a
+                cache directory is configured and the seed is fixed
             
         Returns:
-            dict: Asset placement data
+            dict: Asset placement data. Instances are stored per type under
+                'by_type' as parallel arrays: 'x', 'y', 'z', 'height',
+                'width', 'rotation' of shape (N,) and 'color' of shape (N, 3).
+                Use assets_to_list for one dict per instance.
         """
         if seed is not None:
             master_seed = seed
@@ -456,6 +911,19 @@ class AssetGenerator:
         else:
             master_seed = np.random.randint(0, 1000000)
         
+        # Range masks are computed in float32; z values and depressions use
+        # the caller's precision, since rounding shifts exact 0.1 height steps
+        source_map = np.asarray(height_map)
+        
+        # Seeded placement is deterministic, so a stored result can be reused
+        cache_path = None
+        if cache_enabled and self.cache_dir and (seed is not None or 'seed' in world_params):
+            cache_path = self._asset_cache_path(source_map, world_params, master_seed)
+            if os.path.exists(cache_path):
+                return self._load_cached_assets(cache_path)
+        
+        height_map = self._xp.asarray(source_map, dtype=np.float32)
+        
         # Get entities from world parameters
         entities = world_params.get('entities', [])
         entity_density = world_params.get('entity_density', 0.5)
@@ -476,45 +944,212 @@ class AssetGenerator:
             else:
                 entities = ['tree', 'grass', 'flower', 'rock']  # Default mixed
         
+        type_indices = [self._type_index(e) for e in entities]
+        
+        # Terrain attributes are shared by every entity type, so compute them
+        # once; the depression morphology is also reused across calls on the
+        # same height map. The water boundary is cheaper to recompute than
+        # hashing the map for a cache key
+        slope = self.normalized_slope(height_map)
+        placements = {self._placement[t] for t in type_indices}
+        depression = None
+        boundary = None
+        if 'land_depression' in placements:
+            key = self._terrain_key(source_map)
+            depression = self._cached_terrain(self._depression_cache, key, self.land_depressions,
+                                              self._xp.asarray(source_map))
+        if 'water_crossing' in placements:
+            boundary = self.water_boundary(height_map)
+        
+        # Height and slope ranges of every entity type in one vectorized pass;
+        # large maps are masked per type in bands instead
+        if height_map.size <= self.tile_cells:
+            range_masks = self._range_masks(height_map, slope, type_indices)
+        else:
+            range_masks = [None] * len(type_indices)
+        
+        # Each entity type draws from its own generator, so the result does
+        # not depend on the order in which the types are processed
+        seeds = np.random.SeedSequence(master_seed).spawn(len(entities))
+        rngs = [np.random.default_rng(s) for s in seeds]
+        jobs = [
+            (height_map, source_map, t, mask, entity_density, rng, slope, depression, boundary)
+            for t, mask, rng in zip(type_indices, range_masks, rngs)
+        ]
+        
+        # The types are independent and NumPy releases the GIL on large
+        # arrays, so place them on a thread pool
+        workers = min(len(jobs), os.cpu_count() or 1)
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                blocks = list(executor.map(lambda job: self._place_entity(*job), jobs))
+        else:
+            blocks = [self._place_entity(*job) for job in jobs]
+        
         # Initialize result
-        assets = []
+        by_type = {}
+        total = 0
         
-        # Place each entity type
-        for i, entity_type in enumerate(entities):
-            # Use a different seed for each entity type
-            entity_seed = master_seed + i
+        for entity_type, block in zip(entities, blocks):
+            n = block['x'].size
+            if n == 0:
+                continue
             
-            # Find suitable locations
-            locations = self.find_placement_locations(
-                height_map, 
-                entity_type, 
-                density=entity_density,
-                seed=entity_seed
-            )
+            # The same type may be requested more than once
+            if entity_type in by_type:
+                previous = by_type[entity_type]
+                block = {key: np.concatenate([previous[key], values]) for key, values in block.items()}
             
-            # Generate and place assets
-            for j, (x, y) in enumerate(locations):
-                # Use a different seed for each asset instance
-                instance_seed = entity_seed + j
-                
-                # Generate asset properties
-                props = self.generate_asset_properties(entity_type, seed=instance_seed)
-                
-                # Add position
-                props['position'] = {
-                    'x': x,
-                    'y': y,
-                    'z': height_map[y, x] * 50.0  # Scale height to match 3D conversion
-                }
-                
-                # Add to assets list
-                assets.append(props)
+            by_type[entity_type] = block
+            total += n
         
-        return {
+        assets = {
             'seed': master_seed,
-            'count': len(assets),
-            'assets': assets
+            'count': total,
+            'by_type': by_type
+        }
+        
+        if cache_path is not None:
+            self._store_cached_assets(cache_path, assets)
+        
+        return assets
+    
+    def _asset_cache_path(self, height_map, world_params, master_seed):
+        """
+        Get the cache file for a placement, addressed by its inputs.
+        
+        Args:
+            height_map (numpy.ndarray): Height map as passed by the caller
+            world_params (dict): World generation parameters
+            master_seed (int): Seed of the placement
+            
+        Returns:
+            str: Path of the cache file
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(f"{height_map.shape}{height_map.dtype.str}".encode())
+        digest.update(np.ascontiguousarray(height_map))
+        
+        # Asset definitions and the tiling threshold also shape the result
+        inputs = [world_params, master_seed, self.asset_types, self.tile_cells]
+        digest.update(json.dumps(inputs, sort_keys=True, default=str).encode())
+        
+        return os.path.join(self.cache_dir, f"assets_{digest.hexdigest()}.npz")
+    
+    def _store_cached_assets(self, cache_path, assets):
+        """
+        Save asset placement data to the persistent cache.
+        
+        Args:
+            cache_path (str): Path of the cache file
+            assets (dict): Asset placement data from place_assets
+        """
+        arrays = {
+            'seed': np.asarray(assets['seed']),
+            'types': np.array(list(assets['by_type']), dtype=str)
         }
+        for i, block in enumerate(assets['by_type'].values()):
+            for key, values in block.items():
+                arrays[f"{i}_{key}"] = values
+        
+        # Write to a temporary file first so readers never see a partial file
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, **arrays)
+        os.replace(tmp_path, cache_path)
+    
+    def _load_cached_assets(self, cache_path):
+        """
+        Load asset placement data from the persistent cache.
+        
+        Args:
+            cache_path (str): Path of the cache file
+            
+        Returns:
+            dict: Asset placement data
+        """
+        fields = ('x', 'y', 'z', 'height', 'width', 'color', 'rotation')
+        with np.load(cache_path) as data:
+            by_type = {
+                str(asset_type): {key: data[f"{i}_{key}"] for key in fields}
+                for i, asset_type in enumerate(data['types'])
+            }
+            seed = data['seed'].item()
+        
+        return {
+            'seed': seed,
+            'count': sum(block['x'].size for block in by_type.values()),
+            'by_type': by_type
+        }
+    
+    def _place_entity(self, height_map, source_map, t, mask, density, rng, slope, depression, boundary):
+        """
+        Place all instances of one asset type and draw their properties.
+        
+        Args:
+            height_map (numpy.ndarray): 2D float32 array of height values
+            source_map (numpy.ndarray): The height map at the caller's
+                precision, in host memory
+            t (int): Row of the asset type in the type tables
+            mask (numpy.ndarray): Range mask of the type from _range_masks,
+                or None to mask the map in bands
+            density (float): Density factor for asset placement (0.0 to 2.0)
+            rng (numpy.random.Generator): Generator to draw from
+            slope (numpy.ndarray): Normalized slope of the height map
+            depression (numpy.ndarray): Land depressions, or None
+            boundary (numpy.ndarray): Water boundary, or None
+            
+        Returns:
+            dict: Per-instance property arrays of the type
+        """
+        # Find suitable locations
+        x_coords, y_coords = self._placement_coords(
+            height_map, t, density, rng, slope, mask=mask, depression=depression, boundary=boundary
+        )
+        n = x_coords.size
+        
+        z = source_map[y_coords, x_coords]
+        
+        # Draw the properties of every instance in one vectorized call each
+        return {
+            'x': x_coords,
+            'y': y_coords,
+            'z': z * 50.0,  # Scale height to match 3D conversion
+            'height': rng.uniform(*self._height_range[t], size=n),
+            'width': rng.uniform(*self._width_range[t], size=n),
+            'color': rng.uniform(*self._color_range[t], size=(n, 3)),
+            'rotation': rng.uniform(0, 360, size=n)
+        }
+    
+    def assets_to_list(self, assets):
+        """
+        Expand asset placement data into one dict per asset instance.
+        
+        Args:
+            assets (dict): Asset placement data from place_assets
+            
+        Returns:
+            list: Asset dicts with type, height, width, color, rotation and position
+        """
+        asset_list = []
+        for asset_type, block in assets['by_type'].items():
+            asset_list.extend(
+                {
+                    'type': asset_type,
+                    'height': height,
+                    'width': width,
+                    'color': color,
+                    'rotation': rotation,
+                    'position': {'x': x, 'y': y, 'z': z}
+                }
+                for height, width, color, rotation, x, y, z in zip(
+                    block['height'].tolist(), block['width'].tolist(),
+                    block['color'].tolist(), block['rotation'].tolist(),
+                    block['x'].tolist(), block['y'].tolist(), block['z'].tolist()
+                )
+            )
+        return asset_list
     
     def visualize_asset_placement(self, height_map, assets, output_path=None):
         """
@@ -526,19 +1161,23 @@ class AssetGenerator:
             output_path (str, optional): Path to save the visualization
             
         Returns:
-            matplotlib.figure.Figure: The figure object if output_path is None
+            matplotlib.figure.Figure: The figure object if output_path is None.
+                The figure is reused, so the next call redraws it.
         """
-        # Create a colormap for the height map
-        colors = [(0, 0, 0.5), (0, 0, 1), (0, 0.5, 1), 
-                 (0, 1, 1), (0.5, 1, 0.5), (1, 1, 0), 
-                 (1, 0.5, 0), (1, 0, 0), (0.5, 0, 0)]
-        cmap = LinearSegmentedColormap.from_list("mandelbro", colors)
-        
-        # Create figure
-        plt.figure(figsize=(12, 10))
+        # Create the figure once, then clear it for each new plot
+        if self._fig is None:
+            self._fig = Figure(figsize=(12, 10))
+            self._ax = self._fig.add_subplot()
+        else:
+            # A previous call that failed part way may not have added one
+            if self._colorbar is not None:
+                self._colorbar.remove()
+                self._colorbar = None
+            self._ax.clear()
+        ax = self._ax
         
         # Plot height map
-        plt.imshow(height_map, cmap=cmap)
+        image = ax.imshow(height_map, cmap=_MB_CMAP)
         
         # Define marker styles for different asset types
         marker_styles = {
@@ -569,26 +1208,14 @@ class AssetGenerator:
         # Default marker style
         default_style = {'marker': 'o', 'color': 'red', 'size': 20}
         
-        # Group assets by type for more efficient plotting
-        assets_by_type = {}
-        for asset in assets['assets']:
-            asset_type = asset['type']
-            if asset_type not in assets_by_type:
-                assets_by_type[asset_type] = []
-            assets_by_type[asset_type].append(asset)
-        
         # Plot assets
-        for asset_type, asset_list in assets_by_type.items():
+        for asset_type, block in assets['by_type'].items():
             style = marker_styles.get(asset_type, default_style)
             
-            # Extract positions
-            x_positions = [asset['position']['x'] for asset in asset_list]
-            y_positions = [asset['position']['y'] for asset in asset_list]
-            
             # Plot with appropriate style
-            plt.scatter(
-                x_positions, 
-                y_positions, 
+            ax.scatter(
+                block['x'], 
+                block['y'], 
                 marker=style['marker'], 
                 color=style['color'], 
                 s=style['size'],
@@ -597,29 +1224,50 @@ class AssetGenerator:
             )
         
         # Add legend
-        if assets_by_type:
-            plt.legend(loc='upper right', bbox_to_anchor=(1.1, 1.05))
+        if assets['by_type']:
+            ax.legend(loc='upper right', bbox_to_anchor=(1.1, 1.05))
         
-        plt.title('MandelBro World with Assets')
-        plt.colorbar(label='Height')
+        ax.set_title('MandelBro World with Assets')
+        self._colorbar = self._fig.colorbar(image, ax=ax, label='Height')
         
         if output_path:
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
+            self._fig.savefig(output_path, dpi=150, bbox_inches='tight')
             return None
         
-        return plt.gcf()
+        return self._fig
     
-    def export_assets_to_json(self, assets, output_path):
+    def export_assets_to_json(self, assets, output_path, pretty=False):
         """
         Export asset data to a JSON file.
         
         Args:
             assets (dict): Asset placement data
             output_path (str): Path to save the JSON file
+            pretty (bool): Indent the output for readability
         """
+        data = {
+            'seed': int(assets['seed']),
+            'count': assets['count'],
+            'by_type': assets['by_type']
+        }
+        
+        # orjson serializes the per-type arrays natively
+        if orjson is not None:
+            option = orjson.OPT_SERIALIZE_NUMPY
+            if pretty:
+                option |= orjson.OPT_INDENT_2
+            with open(output_path, 'wb') as f:
+                f.write(orjson.dumps(data, option=option))
+            return
+        
+        # Convert each per-type array to a JSON list in one call
+        data['by_type'] = {
+            asset_type: {key: values.tolist() for key, values in block.items()}
+            for asset_type, block in assets['by_type'].items()
+        }
+        
         with open(output_path, 'w') as f:
-            json.dump(assets, f, indent=2)
+            json.dump(data, f, indent=2 if pretty else None)
     
     def generate_world_assets(self, height_map, world_params, output_dir):
         """
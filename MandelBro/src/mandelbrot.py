@@ -9,15 +9,160 @@ generate height maps, and convert them to 3D terrain data.
 import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib.colors import LinearSegmentedColormap
+from PIL import Image
 import json
 import os
 
+try:
+    from numba import njit, prange
+except ImportError:  # Numba is optional; calculate_mandelbrot falls back to NumPy
+    njit = None
+
+
+if njit is not None:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _mandel_kernel(xs, ys, max_iterations, out):
+        """Per-pixel escape loop that stops each point as soon as it escapes."""
+        for y in prange(ys.size):
+            ci = ys[y]
+            for x in range(xs.size):
+                cr = xs[x]
+                # Zeros in the coordinates' dtype, so float32 grids
+                # are iterated in single precision
+                zr = cr - cr
+                zi = zr
+                zr2 = zr
+                zi2 = zr
+                out[y, x] = max_iterations
+                # Points inside the main cardioid or period-2 bulb never escape
+                xc = cr - 0.25
+                q = xc * xc + ci * ci
+                if q * (q + xc) < 0.25 * ci * ci or (cr + 1.0) * (cr + 1.0) + ci * ci < 0.0625:
+                    continue
+                for i in range(max_iterations):
+                    zi = zr * zi
+                    zi = zi + zi + ci
+                    zr = zr2 - zi2 + cr
+                    zr2 = zr * zr
+                    zi2 = zi * zi
+                    if zr2 + zi2 > 4.0:
+                        out[y, x] = i
+                        break
+else:
+    _mandel_kernel = None
+
+try:
+    from mandelbrot_kernel import compute as _compiled_kernel
+except ImportError:  # Compiled kernel is optional; build it with setup.py
+    _compiled_kernel = None
+
+try:
+    from _mandel_simd import mandel_avx2 as _simd_kernel
+except ImportError:  # AVX2 kernel is optional and only loads on AVX2/FMA CPUs
+    _simd_kernel = None
+
+try:
+    from _mandel_avx512 import mandel_avx512 as _avx512_kernel
+except ImportError:  # AVX-512 kernel is optional and only loads on AVX-512 CPUs
+    _avx512_kernel = None
+
+try:
+    import cupy as cp
+except ImportError:  # CuPy is optional; large views are computed on the CPU
+    cp = None
+
+if cp is not None:
+    # Escape loop run by one CUDA thread per pixel; cr and ci broadcast to the
+    # output grid and T follows their dtype
+    _mandel_gpu_kernel = cp.ElementwiseKernel(
+        'T cr, T ci, int32 max_iter',
+        'int32 out',
+        '''
+        out = max_iter;
+        T xc = cr - (T)0.25;
+        T q = xc * xc + ci * ci;
+        T xb = cr + (T)1.0;
+        if (q * (q + xc) >= (T)0.25 * ci * ci && xb * xb + ci * ci >= (T)0.0625) {
+            T zr = 0, zi = 0, zr2 = 0, zi2 = 0;
+            for (int n = 0; n < max_iter; n++) {
+                zi = (T)2.0 * zr * zi + ci;
+                zr = zr2 - zi2 + cr;
+                zr2 = zr * zr;
+                zi2 = zi * zi;
+                if (zr2 + zi2 > (T)4.0) {
+                    out = n;
+                    break;
+                }
+            }
+        }
+        ''',
+        'mandelbro_escape'
+    )
+else:
+    _mandel_gpu_kernel = None
+
+
+def _cpu_flags():
+    """
+    Read the instruction set extensions supported by the CPU.
+    
+    Returns:
+        set: Flags listed in /proc/cpuinfo, or None if it cannot be read
+    """
+    try:
+        with open('/proc/cpuinfo') as f:
+            for line in f:
+                if line.startswith('flags'):
+                    return set(line.split(':', 1)[1].split())
+    except OSError:
+        pass
+    return None
+
+
+def _select_kernel():
+    """
+    Pick the fastest escape-loop kernel available on this machine.
+    
+    Returns:
+        callable: Kernel taking (xs, ys, max_iterations, out), or None to use NumPy
+    """
+    flags = _cpu_flags()
+    
+    def supports(*names):
+        # Without /proc/cpuinfo, rely on the extensions' own import-time check
+        return flags is None or all(name in flags for name in names)
+    
+    if _avx512_kernel is not None and supports('avx512f', 'avx512dq'):
+        return _avx512_kernel
+    if _simd_kernel is not None and supports('avx2', 'fma'):
+        return _simd_kernel
+    # The Numba kernel spreads rows across cores while the Cython one runs
+    # on a single thread, so Cython is only used when Numba is missing
+    if _mandel_kernel is not None:
+        return _mandel_kernel
+    return _compiled_kernel
+
+
+_best_kernel = _select_kernel()
+
+
 class MandelbrotGenerator:
     """
     A class to generate Mandelbrot set-based terrain for the MandelBro game.
     """
     
-    def __init__(self, width=800, height=600, max_iterations=100):
+    # Single precision is only used while the pixel step spans at least this
+    # many float32 ulps at the view's magnitude. The iteration amplifies
+    # rounding error, so finer views give a growing share of boundary pixels
+    # different counts than double precision long before neighbouring
+    # coordinates collide
+    SINGLE_PRECISION_MIN_STEP_ULPS = 1024
+    
+    # Views needing more pixel iterations than this go to the GPU when enabled;
+    # smaller ones don't amortize the transfer and launch overhead
+    GPU_MIN_WORK = 5e7
+    
+    def __init__(self, width=800, height=600, max_iterations=100, precision='single', use_gpu=False):
         """
         Initialize the Mandelbrot generator with default parameters.
         
@@ -25,15 +170,37 @@ class MandelbrotGenerator:
             width (int): Width of the generated image
             height (int): Height of the generated image
             max_iterations (int): Maximum number of iterations for the Mandelbrot calculation
+            precision (str): 'single' to iterate in float32, or 'double' for float64.
+                Single precision switches to double automatically at deep zooms.
+            use_gpu (bool): Compute large views with CuPy on the GPU when it is installed
         """
+        if precision not in ('single', 'double'):
+            raise ValueError(f"precision must be 'single' or 'double', not {precision!r}")
+        
         self.width = width
         self.height = height
         self.max_iterations = max_iterations
+        self.precision = precision
+        
+        if use_gpu and cp is None:
+            print("Warning: CuPy is not installed, computing the Mandelbrot set on the CPU")
+        self.use_gpu = use_gpu and cp is not None
         self.center_x = -0.5
         self.center_y = 0
         self.zoom = 1.0
         self.color_map = self._create_default_colormap()
         
+        # RGB lookup table for writing color-mapped images without Matplotlib
+        self._lut = self.color_map(np.arange(self.color_map.N), bytes=True)[:, :3]
+        
+        self._kernel = _best_kernel
+        
+        # Compile the kernel now so the first calculation isn't slowed by it
+        if _mandel_kernel is not None and self._kernel is _mandel_kernel:
+            for dtype in (np.float32, np.float64):
+                coords = np.zeros(1, dtype=dtype)
+                _mandel_kernel(coords, coords, 1, np.empty((1, 1), dtype=np.int32))
+        
     def _create_default_colormap(self):
         """Create a default colormap for visualization."""
         colors = [(0, 0, 0.5), (0, 0, 1), (0, 0.5, 1), 
@@ -51,35 +218,124 @@ class MandelbrotGenerator:
         Returns:
             numpy.ndarray: 2D array of iteration counts
         """
-        # Create a grid of complex numbers
-        real, imag = np.meshgrid(
-            np.linspace(x_min, x_max, self.width),
-            np.linspace(y_min, y_max, self.height)
-        )
-        c = real + imag * 1j
-        z = np.zeros_like(c)
+        # Coordinates of the pixel centers along each axis
+        dtype = self._coordinate_dtype(x_min, x_max, y_min, y_max)
+        xs = np.linspace(x_min, x_max, self.width, dtype=dtype)
+        ys = np.linspace(y_min, y_max, self.height, dtype=dtype)
+        output = np.empty((self.height, self.width), dtype=np.int32)
+        
+        # The set is symmetric about the real axis, so a view centred on it
+        # only needs its upper rows computed; the rest are mirrored
+        rows = self.height
+        if abs(y_min + y_max) < 1e-12:
+            rows = (self.height + 1) // 2
+        
+        if self.use_gpu and self.width * rows * self.max_iterations > self.GPU_MIN_WORK:
+            self._mandelbrot_gpu(xs, ys[:rows], output[:rows])
+        elif self._kernel is not None:
+            self._kernel(xs, ys[:rows], self.max_iterations, output[:rows])
+        else:
+            self._mandelbrot_numpy(xs, ys[:rows], output[:rows])
+        
+        if rows < self.height:
+            output[self.height - rows:] = output[rows - 1::-1]
+        
+        return output
+    
+    def _coordinate_dtype(self, x_min, x_max, y_min, y_max):
+        """
+        Choose the floating point type for iterating a view.
+        
+        Args:
+            x_min, x_max, y_min, y_max: Bounds of the view
+            
+        Returns:
+            numpy.dtype: float32 for single precision at moderate zooms, float64 otherwise
+        """
+        if self.precision != 'single':
+            return np.float64
+        
+        # Compare the finest pixel step with the float32 spacing at the view's
+        # largest coordinate
+        step = min((x_max - x_min) / max(self.width - 1, 1),
+                   (y_max - y_min) / max(self.height - 1, 1))
+        magnitude = max(abs(x_min), abs(x_max), abs(y_min), abs(y_max), 1.0)
+        if step >= self.SINGLE_PRECISION_MIN_STEP_ULPS * np.finfo(np.float32).eps * magnitude:
+            return np.float32
+        return np.float64
+    
+    def _mandelbrot_gpu(self, xs, ys, output):
+        """
+        Calculate escape iteration counts on the GPU with CuPy.
+        
+        Args:
+            xs (numpy.ndarray): Real coordinates of the columns
+            ys (numpy.ndarray): Imaginary coordinates of the rows
+            output (numpy.ndarray): 2D array receiving the iteration counts
+        """
+        cr = cp.asarray(xs)[None, :]
+        ci = cp.asarray(ys)[:, None]
+        output[...] = cp.asnumpy(_mandel_gpu_kernel(cr, ci, np.int32(self.max_iterations)))
+    
+    def _mandelbrot_numpy(self, xs, ys, output):
+        """
+        Calculate escape iteration counts with vectorized NumPy operations.
         
-        # Initialize the output array
-        output = np.zeros(c.shape, dtype=int)
-        mask = np.ones(c.shape, dtype=bool)
+        Args:
+            xs (numpy.ndarray): Real coordinates of the columns
+            ys (numpy.ndarray): Imaginary coordinates of the rows
+            output (numpy.ndarray): 2D array receiving the iteration counts
+        """
+        shape = output.shape
+        dtype = xs.dtype
+        
+        # Complex values are kept as separate real and imaginary planes that
+        # are updated in place, so no per-iteration temporaries are allocated
+        cr = np.empty(shape, dtype=dtype)
+        ci = np.empty(shape, dtype=dtype)
+        cr[:] = xs
+        ci[:] = ys[:, None]
+        zr = np.zeros(shape, dtype=dtype)
+        zi = np.zeros(shape, dtype=dtype)
+        zr2 = np.zeros(shape, dtype=dtype)  # zr**2
+        zi2 = np.zeros(shape, dtype=dtype)  # zi**2
+        mag2 = np.empty(shape, dtype=dtype)  # |z|**2
+        
+        # Points that never escape keep max_iterations; those inside the main
+        # cardioid or the period-2 bulb are known not to, so skip them
+        output.fill(self.max_iterations)
+        xc = cr - 0.25
+        ci_sq = ci * ci
+        q = xc * xc + ci_sq
+        alive = q * (q + xc) >= 0.25 * ci_sq
+        alive &= (cr + 1.0) ** 2 + ci_sq >= 0.0625
+        del xc, ci_sq, q
+        escaped = np.empty(shape, dtype=bool)
         
         # Perform the iteration
         for i in range(self.max_iterations):
-            z[mask] = z[mask]**2 + c[mask]
-            # Points that escape
-            diverged = np.abs(z) > 2.0
-            # Update output with current iteration count
-            output[diverged & mask] = i
-            # Update mask to exclude diverged points
-            mask[diverged] = False
-            # If all points have diverged, break early
-            if not np.any(mask):
-                break
-                
-        # Set max_iterations for points that never escaped
-        output[mask] = self.max_iterations
-        
-        return output
+            # z = z**2 + c for the points still iterating; escaped points
+            # are left untouched so they cannot overflow
+            np.multiply(zr, zi, out=zi, where=alive)
+            np.multiply(zi, 2.0, out=zi, where=alive)
+            np.add(zi, ci, out=zi, where=alive)
+            np.subtract(zr2, zi2, out=zr, where=alive)
+            np.add(zr, cr, out=zr, where=alive)
+            
+            # Points that escape, tested on |z|**2 to avoid the square root
+            np.multiply(zr, zr, out=zr2, where=alive)
+            np.multiply(zi, zi, out=zi2, where=alive)
+            np.add(zr2, zi2, out=mag2, where=alive)
+            np.greater(mag2, 4.0, out=escaped)
+            escaped &= alive
+            
+            if escaped.any():
+                # Update output with current iteration count
+                np.putmask(output, escaped, i)
+                alive ^= escaped
+                # If all points have diverged, break early
+                if not alive.any():
+                    break
     
     def generate_height_map(self, custom_params=None):
         """
@@ -125,20 +381,42 @@ class MandelbrotGenerator:
             output_path (str, optional): Path to save the visualization
             
         Returns:
-            matplotlib.figure.Figure: The figure object
+            matplotlib.figure.Figure: The figure object, or None when saved to output_path
         """
+        if output_path:
+            # Write the color-mapped pixels directly, one per height map cell
+            Image.fromarray(self._colorize(height_map)).save(output_path, optimize=True)
+            return None
+        
         plt.figure(figsize=(10, 8))
         plt.imshow(height_map, cmap=self.color_map)
         plt.colorbar(label='Height')
         plt.title('MandelBro Height Map')
         
-        if output_path:
-            plt.savefig(output_path, dpi=300, bbox_inches='tight')
-            plt.close()
-            return None
-        
         return plt.gcf()
     
+    def _colorize(self, height_map):
+        """
+        Color-map a height map through the lookup table.
+        
+        Heights are scaled to the map's own range, as imshow does.
+        
+        Args:
+            height_map (numpy.ndarray): The height map to color
+            
+        Returns:
+            numpy.ndarray: (height, width, 3) uint8 RGB image
+        """
+        low = height_map.min()
+        span = height_map.max() - low
+        if span > 0:
+            indices = ((height_map - low) * (len(self._lut) / span)).astype(np.intp)
+            np.clip(indices, 0, len(self._lut) - 1, out=indices)
+        else:
+            indices = np.zeros(height_map.shape, dtype=np.intp)
+        
+        return self._lut[indices]
+    
     def save_height_map(self, height_map, output_path):
         """
         Save the height map as a NumPy array file.
@@ -170,33 +448,32 @@ class MandelbrotGenerator:
             scale_factor (float): Scaling factor for height values
             
         Returns:
-            dict: Dictionary containing vertices, faces, and normals
+            dict: Dictionary containing (N, 3) arrays of vertices, faces, and normals
         """
         height, width = height_map.shape
         
-        # Create vertices
-        vertices = []
-        for y in range(height):
-            for x in range(width):
-                # Scale x and y to be centered
-                scaled_x = (x - width/2) / width
-                scaled_y = (y - height/2) / height
-                # Get height from height map
-                z = height_map[y, x] * scale_factor
-                vertices.append([scaled_x, scaled_y, z])
-        
-        # Create faces (triangles)
-        faces = []
-        for y in range(height-1):
-            for x in range(width-1):
-                # Calculate vertex indices
-                i = y * width + x
-                # Create two triangles for each grid cell
-                faces.append([i, i+1, i+width])
-                faces.append([i+1, i+width+1, i+width])
-        
-        # Calculate simple normals (not optimized)
-        normals = [[0, 0, 1] for _ in range(len(vertices))]
+        # Create vertices, centered in x and y, one per height map cell
+        xs = (np.arange(width) - width/2) / width
+        ys = (np.arange(height) - height/2) / height
+        grid_x, grid_y = np.meshgrid(xs, ys)
+        vertices = np.stack([grid_x, grid_y, height_map * scale_factor], axis=-1).reshape(-1, 3)
+        
+        # Create faces, two triangles for each grid cell
+        cell_y, cell_x = np.mgrid[0:height-1, 0:width-1]
+        i = (cell_y * width + cell_x).ravel()
+        faces = np.empty((2 * i.size, 3), dtype=np.int32)
+        faces[0::2] = np.stack([i, i+1, i+width], axis=1)
+        faces[1::2] = np.stack([i+1, i+width+1, i+width], axis=1)
+        
+        # Calculate per-vertex normals from the surface gradient, using the
+        # same grid spacing as the vertices; an axis a single pixel long has
+        # no gradient, so the surface is taken as flat along it
+        scaled = height_map.astype(np.float32) * np.float32(scale_factor)
+        grad_y = np.gradient(scaled, np.float32(1 / height), axis=0) if height > 1 else np.zeros_like(scaled)
+        grad_x = np.gradient(scaled, np.float32(1 / width), axis=1) if width > 1 else np.zeros_like(scaled)
+        normals = np.stack([-grad_x, -grad_y, np.ones_like(grad_x)], axis=-1)
+        normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+        normals = normals.reshape(-1, 3)
         
         return {
             'vertices': vertices,
@@ -212,10 +489,34 @@ class MandelbrotGenerator:
             mesh_data (dict): The mesh data to export
             output_path (str): Path to save the JSON file
         """
+        # Arrays are only converted to lists here, at the JSON boundary
+        mesh_data = {
+            key: value.tolist() if isinstance(value, np.ndarray) else value
+            for key, value in mesh_data.items()
+        }
+        
         with open(output_path, 'w') as f:
             json.dump(mesh_data, f)
     
-    def generate_world_from_description(self, description, output_dir):
+    def export_to_binary(self, mesh_data, output_path):
+        """
+        Export 3D mesh data to a compressed NumPy archive.
+        
+        The archive holds float32 vertices and normals and uint32 faces, and is
+        far smaller and faster to write than the JSON export.
+        
+        Args:
+            mesh_data (dict): The mesh data to export
+            output_path (str): Path to save the .npz file
+        """
+        np.savez_compressed(
+            output_path,
+            vertices=np.asarray(mesh_data['vertices'], dtype=np.float32),
+            faces=np.asarray(mesh_data['faces'], dtype=np.uint32),
+            normals=np.asarray(mesh_data['normals'], dtype=np.float32)
+        )
+    
+    def generate_world_from_description(self, description, output_dir, legacy_json=False):
         """
         Generate a world based on a text description.
         
@@ -225,6 +526,7 @@ class MandelbrotGenerator:
         Args:
             description (str): Text description of the desired world
             output_dir (str): Directory to save the generated files
+            legacy_json (bool): Export the mesh as JSON instead of a binary .npz archive
             
         Returns:
             dict: Information about the generated world
@@ -290,9 +592,13 @@ class MandelbrotGenerator:
         # Convert to 3D mesh data
         mesh_data = self.convert_to_3d_mesh_data(height_map)
         
-        # Export to JSON
-        json_path = os.path.join(output_dir, 'terrain_mesh.json')
-        self.export_to_json(mesh_data, json_path)
+        # Export the mesh, as JSON only when explicitly requested
+        if legacy_json:
+            mesh_path = os.path.join(output_dir, 'terrain_mesh.json')
+            self.export_to_json(mesh_data, mesh_path)
+        else:
+            mesh_path = os.path.join(output_dir, 'terrain_mesh.npz')
+            self.export_to_binary(mesh_data, mesh_path)
         
         # Return information about the generated world
         return {
@@ -301,7 +607,7 @@ class MandelbrotGenerator:
             'files': {
                 'visualization': vis_path,
                 'height_map': height_map_path,
-                'mesh_data': json_path
+                'mesh_data': mesh_path
             }
         }
 
@@ -8,15 +8,33 @@ It processes text and voice inputs to extract parameters for the Mandelbrot set
 import re
 import json
 import os
+import copy
+import math
+import hashlib
 import numpy as np
 from collections import defaultdict
 
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; keywords are matched per word instead
+    ahocorasick = None
+
 class DescriptionProcessor:
     """
     A class to process natural language descriptions and convert them to
     Mandelbrot set parameters for world generation.
     """
     
+    # Anything that is neither a word character nor whitespace
+    _PUNCTUATION_RE = re.compile(r'[^\w\s]')
+    
+    # Words used for the simple sentiment analysis
+    _POSITIVE_WORDS = frozenset({'beautiful', 'amazing', 'wonderful', 'great', 'good', 'nice', 'lovely', 'fantastic', 'awesome', 'excellent'})
+    _NEGATIVE_WORDS = frozenset({'ugly', 'terrible', 'horrible', 'bad', 'awful', 'nasty', 'dreadful', 'poor', 'unpleasant', 'disgusting'})
+    
+    # Biome parameters averaged when a description names two biomes
+    _BLEND_KEYS = ('center_x', 'center_y', 'zoom', 'max_iterations')
+    
     def __init__(self, keywords_file=None):
         """
         Initialize the description processor.
@@ -144,6 +162,45 @@ class DescriptionProcessor:
                     self.feature_keywords.update(custom_keywords['feature_keywords'])
                 if 'entity_keywords' in custom_keywords:
                     self.entity_keywords.update(custom_keywords['entity_keywords'])
+        
+        self._build_keyword_sets()
+        
+        # World parameters cached by description, oldest first
+        self.world_cache_size = 1024
+        self._world_cache = {}
+    
+    def _build_keyword_sets(self):
+        """Cache the keyword vocabularies for fast matching."""
+        self._biome_set = frozenset(self.biome_keywords)
+        self._feature_set = frozenset(self.feature_keywords)
+        self._entity_set = frozenset(self.entity_keywords)
+        
+        # Blendable biome parameters as one row per biome, NaN where a biome
+        # doesn't define a parameter
+        self._biome_index = {name: i for i, name in enumerate(self.biome_keywords)}
+        self._biome_params = np.array(
+            [[biome.get(key, np.nan) for key in self._BLEND_KEYS] for biome in self.biome_keywords.values()],
+            dtype=np.float64
+        ).reshape(-1, len(self._BLEND_KEYS))
+        
+        # A single automaton over every vocabulary finds all keywords, including
+        # multi-word ones, in one pass over the text
+        self._automaton = None
+        if ahocorasick is not None:
+            categories = defaultdict(list)
+            for category, vocabulary in (('biomes', self._biome_set),
+                                         ('features', self._feature_set),
+                                         ('entities', self._entity_set)):
+                for keyword in vocabulary:
+                    categories[keyword].append(category)
+            
+            self._automaton = ahocorasick.Automaton()
+            for keyword, keyword_categories in categories.items():
+                self._automaton.add_word(keyword, (keyword, keyword_categories))
+            if categories:
+                self._automaton.make_automaton()
+            else:
+                self._automaton = None
     
     def save_keywords(self, output_file):
         """
@@ -175,10 +232,10 @@ class DescriptionProcessor:
         text = text.lower()
         
         # Remove punctuation
-        text = re.sub(r'[^\w\s]', ' ', text)
+        text = self._PUNCTUATION_RE.sub(' ', text)
         
         # Replace multiple spaces with a single space
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = ' '.join(text.split())
         
         return text
     
@@ -192,32 +249,56 @@ class DescriptionProcessor:
         Returns:
             dict: Dictionary of extracted keywords by category
         """
+        if self._automaton is not None:
+            return self._extract_keywords_automaton(text)
+        
         words = text.split()
         
-        # Initialize result dictionary
+        # Match each category in order of appearance
+        extracted = {
+            'biomes': [word for word in words if word in self._biome_set],
+            'features': [word for word in words if word in self._feature_set],
+            'entities': [word for word in words if word in self._entity_set]
+        }
+        
+        return extracted
+    
+    def _extract_keywords_automaton(self, text):
+        """
+        Extract keywords with the Aho-Corasick automaton.
+        
+        Args:
+            text (str): Preprocessed text description
+            
+        Returns:
+            dict: Dictionary of extracted keywords by category
+        """
         extracted = {
             'biomes': [],
             'features': [],
             'entities': []
         }
         
-        # Extract biome keywords
-        for word in words:
-            if word in self.biome_keywords:
-                extracted['biomes'].append(word)
-            if word in self.feature_keywords:
-                extracted['features'].append(word)
-            if word in self.entity_keywords:
-                extracted['entities'].append(word)
+        for end, (keyword, categories) in self._automaton.iter(text):
+            # Only accept whole words, so 'plain' doesn't match inside 'explaining';
+            # words are separated by any whitespace, as with str.split
+            start = end - len(keyword) + 1
+            if start > 0 and not text[start - 1].isspace():
+                continue
+            if end + 1 < len(text) and not text[end + 1].isspace():
+                continue
+            
+            for category in categories:
+                extracted[category].append(keyword)
         
         return extracted
     
-    def analyze_sentiment(self, text):
+    def analyze_sentiment(self, words):
         """
         Perform simple sentiment analysis on the text.
         
         Args:
-            text (str): Input text description
+            words (list): Lowercase words of the description, or the raw text as a str
             
         Returns:
             dict: Sentiment scores
@@ -225,13 +306,11 @@ class DescriptionProcessor:
         # This is a very simplified sentiment analysis
         # In a real implementation, you would use a proper NLP library
         
-        positive_words = ['beautiful', 'amazing', 'wonderful', 'great', 'good', 'nice', 'lovely', 'fantastic', 'awesome', 'excellent']
-        negative_words = ['ugly', 'terrible', 'horrible', 'bad', 'awful', 'nasty', 'dreadful', 'poor', 'unpleasant', 'disgusting']
-        
-        words = text.lower().split()
+        if isinstance(words, str):
+            words = words.lower().split()
         
-        positive_count = sum(1 for word in words if word in positive_words)
-        negative_count = sum(1 for word in words if word in negative_words)
+        positive_count = sum(1 for word in words if word in self._POSITIVE_WORDS)
+        negative_count = sum(1 for word in words if word in self._NEGATIVE_WORDS)
         
         total_count = len(words)
         if total_count == 0:
@@ -270,8 +349,8 @@ class DescriptionProcessor:
         # Extract keywords
         keywords = self.extract_keywords(processed_text)
         
-        # Analyze sentiment
-        sentiment = self.analyze_sentiment(processed_text)
+        # Analyze sentiment on the already lowercased, tokenized text
+        sentiment = self.analyze_sentiment(processed_text.split())
         
         # Initialize default parameters
         params = {
@@ -295,13 +374,13 @@ class DescriptionProcessor:
             
             # If there are multiple biomes, blend them
             if len(keywords['biomes']) > 1:
-                secondary_biome = keywords['biomes'][1]
-                secondary_params = self.biome_keywords[secondary_biome]
+                secondary_params = self._biome_params[self._biome_index[keywords['biomes'][1]]].tolist()
                 
-                # Simple blending (average)
-                for key in ['center_x', 'center_y', 'zoom', 'max_iterations']:
-                    if key in secondary_params:
-                        params[key] = (params[key] + secondary_params[key]) / 2
+                # Simple blending (average) of the parameters the secondary
+                # biome defines; NaN marks the ones it leaves out
+                for key, value in zip(self._BLEND_KEYS, secondary_params):
+                    if not math.isnan(value):
+                        params[key] = (params[key] + value) / 2
         
         # Apply feature modifiers
         for feature in keywords['features']:
@@ -338,31 +417,48 @@ class DescriptionProcessor:
             params['color_intensity'] *= 0.8
             params['roughness'] *= 1.2
         
+        # Blending can leave a fractional iteration count
+        params['max_iterations'] = int(params['max_iterations'])
+        
         return params
     
+    def clear_world_cache(self):
+        """Drop all cached world parameters."""
+        self._world_cache.clear()
+    
     def generate_world_parameters(self, description):
         """
         Generate complete world parameters from a description.
         
+        Results are cached per description; each call returns a fresh deep
+        copy so callers can modify it freely.
+        
         Args:
             description (str): User's description of the desired world
             
         Returns:
             dict: Complete world parameters including Mandelbrot settings and entities
         """
+        cached = self._world_cache.get(description)
+        if cached is not None:
+            return copy.deepcopy(cached)
+        
         # Process the description to get basic parameters
         params = self.process_description(description)
         
         # Generate a unique seed based on the description
-        # This ensures the same description always generates the same world
-        seed = hash(description) % 1000000
-        np.random.seed(seed)
+        # This ensures the same description always generates the same world,
+        # across processes too, unlike the salted built-in hash()
+        digest = hashlib.blake2b(description.encode('utf-8'), digest_size=4).digest()
+        seed = int.from_bytes(digest, 'big') % 1000000
+        rng = np.random.default_rng(seed)
         
         # Add some randomness to make each world unique
         # but still influenced by the description
-        params['center_x'] += np.random.uniform(-0.05, 0.05)
-        params['center_y'] += np.random.uniform(-0.05, 0.05)
-        params['zoom'] *= np.random.uniform(0.95, 1.05)
+        dx, dy, zoom_factor = rng.uniform([-0.05, -0.05, 0.95], [0.05, 0.05, 1.05])
+        params['center_x'] += float(dx)
+        params['center_y'] += float(dy)
+        params['zoom'] *= float(zoom_factor)
         
         # Add world metadata
         params['description'] = description
@@ -370,6 +466,10 @@ class DescriptionProcessor:
         params['world_id'] = f"world_{seed}"
         params['created_at'] = None  # Would be set to current time in a real implementation
         
+        if len(self._world_cache) >= self.world_cache_size:
+            self._world_cache.pop(next(iter(self._world_cache)))
+        self._world_cache[description] = copy.deepcopy(params)
+        
         return params
 
 
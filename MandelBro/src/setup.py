@@ -0,0 +1,51 @@
+"""
+MandelBro - Native Extension Build Script
+
+Builds the optional compiled kernels used by mandelbrot.py. Run from this
+directory with:
+
+    python setup.py build_ext --inplace
+"""
+
+from setuptools import setup, Extension
+from Cython.Build import cythonize
+
+# Aggressive optimization so GCC can vectorize the inner loops for the host CPU
+extra_compile_args = ["-O3", "-march=native", "-ffast-math"]
+
+extensions = [
+    Extension(
+        "mandelbrot_kernel",
+        ["mandelbrot_kernel.pyx"],
+        extra_compile_args=extra_compile_args,
+    ),
+    # The SIMD kernels need an x86 compiler with OpenMP; where they fail to
+    # build, the rest of the build carries on and mandelbrot.py falls back
+    # to the portable kernels
+    Extension(
+        "_mandel_simd",
+        ["_mandel_simd.c"],
+        extra_compile_args=["-O3", "-mavx2", "-mfma", "-fopenmp"],
+        extra_link_args=["-fopenmp"],
+        optional=True,
+    ),
+    Extension(
+        "_mandel_avx512",
+        ["_mandel_avx512.c"],
+        extra_compile_args=["-O3", "-mavx512f", "-mavx512dq", "-fopenmp"],
+        extra_link_args=["-fopenmp"],
+        optional=True,
+    ),
+]
+
+setup(
+    name="mandelbro-kernels",
+    ext_modules=cythonize(
+        extensions,
+        compiler_directives={
+            "boundscheck": False,
+            "wraparound": False,
+            "cdivision": True,
+        },
+    ),
+)